@@ -1,36 +1,73 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
+import logging
+import threading
+import orjson
+from collections import OrderedDict
 from board import ChessBoard
-from player import HumanPlayer, ComputerPlayer
+from game import GameState, DEFAULT_SKILL_LEVEL
+from player import ComputerPlayer
+from serialization import add_pieces_to_state
+
+# Log at INFO by default; set LOG_LEVEL=DEBUG to see per-move diagnostics
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='.')
 CORS(app)  # Enable CORS for all routes
 
-# Initialize game state
-chess_board = ChessBoard()
-human_player = HumanPlayer('white')
-# Default skill level is 5 (intermediate)
-computer_player = ComputerPlayer('black', skill_level=5)
-
-def add_pieces_to_state(state):
-    """Add piece positions to the state for the frontend"""
-    state['pieces'] = {}
-    for square in range(64):  # Chess has 64 squares (0-63)
-        piece = chess_board.board.piece_at(square)
-        if piece:
-            # Convert square index to name (e.g., 0 -> 'a1')
-            file_idx = square % 8
-            rank_idx = 7 - (square // 8)
-            square_name = chr(97 + file_idx) + str(rank_idx + 1)
-            
-            # Map the colors correctly to the frontend's expectations
-            # In python-chess, piece.color is True for white, False for black
-            state['pieces'][square_name] = {
-                'type': piece.symbol().lower(),
-                'color': 'white' if piece.color else 'black'  # Correct color mapping
-            }
-    return state
+# Games in progress, keyed by the id each client sends in the X-Game-Id header
+# (or the game_id query parameter); clients that send neither share the default game
+DEFAULT_GAME_ID = 'default'
+MAX_GAMES = 1000
+games = OrderedDict()
+games_lock = threading.Lock()
+
+# Master-level White player used only to generate hints for the human
+hint_player = ComputerPlayer('white', skill_level=10)
+
+# Recently generated hints, keyed by (position, hint level)
+HINT_CACHE_SIZE = 256
+hint_cache = OrderedDict()
+hint_cache_lock = threading.Lock()
+
+# Human-readable names for the computer player's skill levels
+SKILL_DESCRIPTIONS = {
+    1: "Complete Beginner",
+    2: "Novice",
+    3: "Learning",
+    4: "Improving",
+    5: "Intermediate",
+    6: "Club Player",
+    7: "Strong Player",
+    8: "Advanced",
+    9: "Expert",
+    10: "Master"
+}
+
+def get_game():
+    """Return the game for the current request, creating it on first use"""
+    game_id = request.headers.get('X-Game-Id') or request.args.get('game_id') or DEFAULT_GAME_ID
+    with games_lock:
+        game = games.get(game_id)
+        if game is None:
+            game = games[game_id] = GameState()
+            # Drop the least recently used game once the registry is full
+            if len(games) > MAX_GAMES:
+                games.popitem(last=False)
+        else:
+            games.move_to_end(game_id)
+    return game
+
+def get_json_body():
+    """Return the request's JSON object, or an empty dict for missing/invalid bodies"""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+def json_response(obj, status=200):
+    """Serialize a board state with orjson, which is much faster than jsonify for these payloads"""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
 
 @app.route('/')
 def index():
@@ -40,61 +77,93 @@ def index():
 @app.route('/board', methods=['GET'])
 def get_board():
     """Get the current board state"""
-    state = chess_board.get_board_state()
-    state = add_pieces_to_state(state)
-    return jsonify(state)
+    game = get_game()
+    state = game.board.get_board_state()
+    state = add_pieces_to_state(state, game.board)
+    return json_response(state)
 
 @app.route('/move', methods=['POST'])
 def make_move():
     """Make a move on the board"""
-    data = request.json
+    data = get_json_body()
     move = data.get('move')
     test_mode = data.get('test_mode', False)
+
+    if not isinstance(move, str):
+        return jsonify({'error': 'Missing move'}), 400
+
+    game = get_game()
+    chess_board = game.board
     
-    print(f"Received move: {move}")
-    print(f"Current board state: {chess_board.board.fen()}")
-    print(f"Current turn: {'white' if chess_board.board.turn else 'black'}")
-    print(f"Legal moves: {[m.uci() for m in chess_board.board.legal_moves]}")
+    # Diagnostics only; building the legal move list is expensive, so skip it unless debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received move: %s", move)
+        logger.debug("Current board state: %s", chess_board.board.fen())
+        logger.debug("Current turn: %s", 'white' if chess_board.board.turn else 'black')
+        logger.debug("Legal moves: %s", [m.uci() for m in chess_board.board.legal_moves])
     
     # Human player makes a move
-    success, state = human_player.make_move(chess_board, move)
+    success, state = game.human.make_move(chess_board, move)
     
     if not success:
-        print(f"Move {move} failed: {state.get('error', 'Unknown error')}")
-        return jsonify(state), 400
+        logger.debug("Move %s failed: %s", move, state.get('error', 'Unknown error'))
+        return json_response(state, 400)
     
-    print(f"Move {move} successful")
+    logger.debug("Move %s successful", move)
     
     # Check if game is over after human move
     if state.get('is_game_over'):
-        state = add_pieces_to_state(state)
-        return jsonify(state)
+        state = add_pieces_to_state(state, chess_board)
+        return json_response(state)
     
     # Only make computer move if not in test mode
     if not test_mode:
         # Computer player makes a move
-        success, state = computer_player.make_move(chess_board)
+        success, state = game.computer.make_move(chess_board)
     
     # Add piece positions for the frontend
-    state = add_pieces_to_state(state)
+    state = add_pieces_to_state(state, chess_board)
     
-    return jsonify(state)
+    return json_response(state)
 
 @app.route('/reset', methods=['POST'])
 def reset_game():
     """Reset the game to the initial state"""
-    global chess_board
+    game = get_game()
     # Re-initialize the chess board
-    chess_board = ChessBoard()
+    game.board = ChessBoard()
+    game.computer.reset_context()
     # Get the new board state
-    state = chess_board.get_board_state()
+    state = game.board.get_board_state()
     # Add piece positions for the frontend
-    state = add_pieces_to_state(state)
-    return jsonify(state)
+    state = add_pieces_to_state(state, game.board)
+    return json_response(state)
+
+@app.route('/setup', methods=['POST'])
+def setup_position():
+    """Start the game from the position given as a FEN string"""
+    fen = get_json_body().get('fen')
+    if not isinstance(fen, str):
+        return jsonify({'error': 'Missing FEN'}), 400
+
+    try:
+        board = ChessBoard(fen)
+    except ValueError:
+        return jsonify({'error': 'Invalid FEN'}), 400
+    if not board.board.is_valid():
+        return jsonify({'error': 'Illegal position'}), 400
+
+    game = get_game()
+    game.board = board
+    game.computer.reset_context()
+    state = game.board.get_board_state()
+    state = add_pieces_to_state(state, game.board)
+    return json_response(state)
 
 @app.route('/skill-level', methods=['GET'])
 def get_skill_level():
     """Get the current computer player skill level"""
+    computer_player = get_game().computer
     return jsonify({
         'skill_level': computer_player.skill_level,
         'description': get_skill_description(computer_player.skill_level)
@@ -103,9 +172,8 @@ def get_skill_level():
 @app.route('/skill-level', methods=['POST'])
 def set_skill_level():
     """Set the computer player skill level (1-10)"""
-    global computer_player
-    data = request.json
-    skill_level = data.get('skill_level', 5)
+    data = get_json_body()
+    skill_level = data.get('skill_level', DEFAULT_SKILL_LEVEL)
 
     # Validate skill level
     try:
@@ -116,9 +184,9 @@ def set_skill_level():
         return jsonify({'error': 'Invalid skill level format'}), 400
 
     # Recreate computer player with new skill level
-    computer_player = ComputerPlayer('black', skill_level=skill_level)
+    get_game().computer = ComputerPlayer('black', skill_level=skill_level)
 
-    print(f"Computer player skill level set to {skill_level}")
+    logger.info("Computer player skill level set to %s", skill_level)
 
     return jsonify({
         'success': True,
@@ -126,10 +194,20 @@ def set_skill_level():
         'description': get_skill_description(skill_level)
     })
 
+@app.route('/skill-levels', methods=['GET'])
+def get_skill_levels():
+    """List every skill level with its description"""
+    return jsonify({
+        'levels': [
+            {'skill_level': level, 'description': description}
+            for level, description in SKILL_DESCRIPTIONS.items()
+        ]
+    })
+
 @app.route('/hint', methods=['POST'])
 def get_hint():
     """Get a hint for the current position"""
-    data = request.json
+    data = get_json_body()
     hint_level = data.get('level', 'basic')  # 'basic', 'intermediate', 'advanced'
     
     # Validate hint level
@@ -138,22 +216,35 @@ def get_hint():
         return jsonify({'error': f'Hint level must be one of: {", ".join(valid_levels)}'}), 400
     
     # Check if it's the human player's turn (White)
+    chess_board = get_game().board
     board_state = chess_board.get_board_state()
     if board_state['turn'] != 'white':
         return jsonify({'error': 'Hints are only available on your turn (White to move)'}), 400
     
-    # Create a temporary ComputerPlayer for White to generate hints
-    temp_hint_player = ComputerPlayer('white', skill_level=10)
-    hint = temp_hint_player.get_hint(chess_board, hint_level)
-    
+    # Repeated requests for the same position are answered without another LLM round-trip.
+    # Request threads share the cache, so every access holds the lock
+    key = (chess_board.board._transposition_key(), hint_level)
+    with hint_cache_lock:
+        hint = hint_cache.get(key)
+        if hint is not None:
+            hint_cache.move_to_end(key)
     if hint is None:
-        return jsonify({'error': 'Unable to generate hint'}), 500
+        hint = hint_player.get_hint(chess_board, hint_level)
+        if hint is None:
+            return jsonify({'error': 'Unable to generate hint'}), 500
+        # Hints made without the LLM (e.g. Ollama down) aren't cached, so a retry asks it again
+        if not hint.pop('fallback', False):
+            with hint_cache_lock:
+                hint_cache[key] = hint
+                if len(hint_cache) > HINT_CACHE_SIZE:
+                    hint_cache.popitem(last=False)
     
     return jsonify(hint)
 
 @app.route('/learning-mode', methods=['GET'])
 def get_learning_mode():
     """Get current learning mode settings"""
+    computer_player = get_game().computer
     return jsonify({
         'enabled': getattr(computer_player, 'learning_mode', False),
         'hint_level': getattr(computer_player, 'hint_level', 'basic')
@@ -162,8 +253,7 @@ def get_learning_mode():
 @app.route('/learning-mode', methods=['POST'])
 def set_learning_mode():
     """Set learning mode settings"""
-    global computer_player
-    data = request.json
+    data = get_json_body()
     
     enabled = data.get('enabled', False)
     hint_level = data.get('hint_level', 'basic')
@@ -174,10 +264,11 @@ def set_learning_mode():
         return jsonify({'error': f'Hint level must be one of: {", ".join(valid_levels)}'}), 400
     
     # Update computer player settings
+    computer_player = get_game().computer
     computer_player.learning_mode = enabled
     computer_player.hint_level = hint_level
     
-    print(f"Learning mode: {'enabled' if enabled else 'disabled'}, hint level: {hint_level}")
+    logger.info("Learning mode: %s, hint level: %s", 'enabled' if enabled else 'disabled', hint_level)
     
     return jsonify({
         'success': True,
@@ -187,19 +278,7 @@ def set_learning_mode():
 
 def get_skill_description(skill_level):
     """Get a description for the skill level"""
-    descriptions = {
-        1: "Complete Beginner",
-        2: "Novice",
-        3: "Learning",
-        4: "Improving",
-        5: "Intermediate",
-        6: "Club Player",
-        7: "Strong Player",
-        8: "Advanced",
-        9: "Expert",
-        10: "Master"
-    }
-    return descriptions.get(skill_level, "Intermediate")
+    return SKILL_DESCRIPTIONS.get(skill_level, "Intermediate")
 
 @app.route('/<path:path>')
 def serve_static(path):
@@ -1,51 +1,93 @@
 import chess
 import json
+import logging
+from collections import OrderedDict
+from serialization import add_pieces_to_state
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of positions kept in the per-board state cache
+STATE_CACHE_SIZE = 1024
 
 class ChessBoard:
-    def __init__(self):
-        # Initialize the board with the standard starting position
-        self.board = chess.Board()
+    def __init__(self, fen=chess.STARTING_FEN):
+        # Initialize the board with the standard starting position, or the given FEN
+        self.board = chess.Board(fen)
         # Ensure the board is set up with white at the bottom (a1-h1) and black at the top (a8-h8)
         # This is the standard chess setup
-        
+
+        # LRU cache of computed board states, keyed by position
+        self._state_cache = OrderedDict()
+
+    def _state_key(self):
+        """Key identifying the current position, including the FEN move counters"""
+        return (
+            self.board._transposition_key(),
+            self.board.halfmove_clock,
+            self.board.fullmove_number
+        )
+
     def get_board_state(self):
         """Return the current state of the board as a dictionary"""
-        state = {
-            'fen': self.board.fen(),
-            'turn': 'white' if self.board.turn else 'black',
-            'is_check': self.board.is_check(),
-            'is_checkmate': self.board.is_checkmate(),
-            'is_stalemate': self.board.is_stalemate(),
-            'is_game_over': self.board.is_game_over(),
-            'legal_moves': [move.uci() for move in self.board.legal_moves]
-        }
-        return state
+        key = self._state_key()
+        state = self._state_cache.get(key)
+        if state is None:
+            # One outcome() call covers checkmate, stalemate and game over instead of
+            # running the legal move generator separately for each flag
+            outcome = self.board.outcome()
+            termination = outcome.termination if outcome is not None else None
+            is_check = self.board.is_check()
+            legal_moves = tuple(move.uci() for move in self.board.legal_moves)
+            # outcome() reports insufficient material ahead of stalemate, so a stalemate
+            # with bare kings and a minor piece has to be recognized from the move list
+            is_stalemate = termination == chess.Termination.STALEMATE or (
+                termination == chess.Termination.INSUFFICIENT_MATERIAL
+                and not is_check and not legal_moves
+            )
+            state = {
+                'fen': self.board.fen(),
+                'turn': 'white' if self.board.turn else 'black',
+                'is_check': is_check,
+                'is_checkmate': termination == chess.Termination.CHECKMATE,
+                'is_stalemate': is_stalemate,
+                'is_game_over': outcome is not None,
+                'legal_moves': legal_moves
+            }
+            self._state_cache[key] = state
+            if len(self._state_cache) > STATE_CACHE_SIZE:
+                self._state_cache.popitem(last=False)
+        else:
+            self._state_cache.move_to_end(key)
+
+        # Hand out a copy so callers can add keys (e.g. 'pieces') without touching the cache
+        result = dict(state)
+        result['legal_moves'] = list(state['legal_moves'])
+        return result
     
     def make_move(self, move_uci):
         """Make a move on the board using UCI notation (e.g., 'e2e4')"""
         try:
-            print(f"Attempting move: {move_uci}")
-            print(f"Current FEN: {self.board.fen()}")
-            print(f"Current turn: {'white' if self.board.turn else 'black'}")
-            print(f"Legal moves: {[move.uci() for move in self.board.legal_moves]}")
-            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Attempting move: %s", move_uci)
+                logger.debug("Current FEN: %s", self.board.fen())
+                logger.debug("Current turn: %s", 'white' if self.board.turn else 'black')
+                logger.debug("Legal moves: %s", [move.uci() for move in self.board.legal_moves])
+
             move = chess.Move.from_uci(move_uci)
-            if move in self.board.legal_moves:
+            if self.board.is_legal(move):
                 self.board.push(move)
-                print(f"Move {move_uci} successful")
+                logger.debug("Move %s successful", move_uci)
                 return True, self.get_board_state()
             else:
-                print(f"Move {move_uci} is illegal")
-                print(f"From square: {move_uci[:2]}, To square: {move_uci[2:4]}")
-                from_square = chess.parse_square(move_uci[:2])
-                to_square = chess.parse_square(move_uci[2:4])
-                piece = self.board.piece_at(from_square)
-                print(f"Piece at from square: {piece}")
-                print(f"Piece color: {piece.color if piece else 'None'}")
-                print(f"Current turn: {self.board.turn}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    piece = self.board.piece_at(move.from_square)
+                    logger.debug("Move %s is illegal", move_uci)
+                    logger.debug("Piece at from square: %s", piece)
+                    logger.debug("Piece color: %s", piece.color if piece else 'None')
+                    logger.debug("Current turn: %s", self.board.turn)
                 return False, {'error': 'Illegal move'}
         except ValueError as e:
-            print(f"Invalid move format: {move_uci}, Error: {str(e)}")
+            logger.debug("Invalid move format: %s, Error: %s", move_uci, e)
             return False, {'error': 'Invalid move format'}
     
     def get_piece_at(self, square_name):
@@ -65,17 +107,8 @@ class ChessBoard:
     
     def to_json(self):
         """Convert the board state to JSON"""
-        state = self.get_board_state()
-        # Add piece positions for the frontend
-        state['pieces'] = {}
-        for square in chess.SQUARES:
-            piece = self.board.piece_at(square)
-            if piece:
-                square_name = chess.square_name(square)
-                state['pieces'][square_name] = {
-                    'type': piece.symbol().lower(),
-                    'color': 'white' if piece.color else 'black'
-                }
+        # Same shape as the API responses, including the frontend piece arrays
+        state = add_pieces_to_state(self.get_board_state(), self)
         return json.dumps(state)
 
 # Made with Bob
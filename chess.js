@@ -159,15 +159,39 @@ function addCoordinateLabels() {
     });
 }
 
+// Each browser tab plays its own game; the server keys games on this id
+const GAME_ID = sessionStorage.getItem('gameId') || Math.random().toString(36).slice(2);
+sessionStorage.setItem('gameId', GAME_ID);
+
+// Call the API for this tab's game
+function apiFetch(path, options = {}) {
+    const headers = { ...(options.headers || {}), 'X-Game-Id': GAME_ID };
+    return fetch(`${API_URL}${path}`, { ...options, headers });
+}
+
+// The server sends pieces as parallel arrays (squares, types, colors);
+// rebuild the square -> piece map the rest of the UI works with
+function unpackPieces(state) {
+    const pieces = {};
+    (state.squares || []).forEach((square, i) => {
+        pieces[square] = {
+            type: state.types[i],
+            color: state.colors[i] ? 'white' : 'black'
+        };
+    });
+    state.pieces = pieces;
+    return state;
+}
+
 // Fetch the current board state from the API
 async function fetchBoardState() {
     try {
-        const response = await fetch(`${API_URL}/board`);
+        const response = await apiFetch(`/board`);
         if (!response.ok) {
             throw new Error('Failed to fetch board state');
         }
         
-        gameState = await response.json();
+        gameState = unpackPieces(await response.json());
         updateBoard();
         updateStatus();
     } catch (error) {
@@ -457,7 +481,7 @@ async function makeMove(from, to) {
         console.log("To square:", gameState.pieces[to] || "empty");
         console.log("Legal moves:", gameState.legal_moves);
 
-        const response = await fetch(`${API_URL}/move`, {
+        const response = await apiFetch(`/move`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -472,7 +496,7 @@ async function makeMove(from, to) {
         }
 
         // Get the new game state
-        gameState = await response.json();
+        gameState = unpackPieces(await response.json());
         console.log("New game state:", gameState);
 
         // Always add the move to history if the server accepted it
@@ -797,7 +821,7 @@ async function resetGame() {
     try {
         setStatus('Resetting game...');
 
-        const response = await fetch(`${API_URL}/reset`, {
+        const response = await apiFetch(`/reset`, {
             method: 'POST'
         });
 
@@ -805,7 +829,7 @@ async function resetGame() {
             throw new Error('Failed to reset game');
         }
 
-        gameState = await response.json();
+        gameState = unpackPieces(await response.json());
 
         // Clear last move tracking
         lastMoveSquares = [];
@@ -855,7 +879,7 @@ function getSkillDescription(level) {
 // Fetch current skill level from server
 async function fetchSkillLevel() {
     try {
-        const response = await fetch(`${API_URL}/skill-level`);
+        const response = await apiFetch(`/skill-level`);
         if (response.ok) {
             const data = await response.json();
             updateSkillDisplay(data.skill_level, data.description);
@@ -875,7 +899,7 @@ async function handleSkillChange(event) {
 
     // Send to server
     try {
-        const response = await fetch(`${API_URL}/skill-level`, {
+        const response = await apiFetch(`/skill-level`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -922,7 +946,7 @@ async function requestHint() {
 
     try {
         const hintLevel = hintLevelSelect ? hintLevelSelect.value : 'basic';
-        const response = await fetch(`${API_URL}/hint`, {
+        const response = await apiFetch(`/hint`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -1084,7 +1108,7 @@ async function handleLearningModeToggle(event) {
     
     try {
         const hintLevel = hintLevelSelect ? hintLevelSelect.value : 'basic';
-        const response = await fetch(`${API_URL}/learning-mode`, {
+        const response = await apiFetch(`/learning-mode`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -1111,7 +1135,7 @@ async function handleHintLevelChange(event) {
     const hintLevel = event.target.value;
     
     try {
-        const response = await fetch(`${API_URL}/learning-mode`, {
+        const response = await apiFetch(`/learning-mode`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -1135,7 +1159,7 @@ async function handleHintLevelChange(event) {
 
 async function fetchLearningModeSettings() {
     try {
-        const response = await fetch(`${API_URL}/learning-mode`);
+        const response = await apiFetch(`/learning-mode`);
         
         if (response.ok) {
             const data = await response.json();
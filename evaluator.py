@@ -0,0 +1,156 @@
+"""
+Static position evaluation on python-chess bitboards.
+
+The numeric core works on a plain tuple of 12 bitboards rather than on a
+chess.Board, so it touches no python-chess objects in its inner loops.
+"""
+
+import chess
+
+# Material values in centipawns, indexed by piece type (index 0 unused)
+PIECE_VALUES = (0, 100, 320, 330, 500, 900, 0)
+
+# Piece-square tables from White's point of view, written rank 8 first so they
+# read like a board diagram. Index with (square ^ 56) for White, square for Black.
+PAWN_TABLE = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+)
+KNIGHT_TABLE = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+BISHOP_TABLE = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+ROOK_TABLE = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0,
+)
+QUEEN_TABLE = (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+)
+KING_TABLE = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+)
+
+# Indexed by piece type (index 0 unused)
+PIECE_SQUARE_TABLES = (None, PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_TABLE)
+
+# Coarse piece values used by the move-filtering heuristic, indexed by piece type
+MOVE_PIECE_VALUES = (0, 1, 3, 3, 5, 9, 0)
+
+# e4, e5, d4, d5
+CENTER_MASK = chess.BB_E4 | chess.BB_E5 | chess.BB_D4 | chess.BB_D5
+
+
+def _move_square_bonuses(back_rank):
+    return tuple(
+        (8 if chess.BB_SQUARES[to_square] & CENTER_MASK else 0)
+        + (5 if chess.square_rank(from_square) == back_rank else 0)
+        for from_square in chess.SQUARES
+        for to_square in chess.SQUARES
+    )
+
+
+# The purely square-dependent part of a move's score: +8 for landing on a center
+# square, +5 for developing off the mover's back rank. Indexed by
+# [white][from_square * 64 + to_square], so scoring needs one lookup, not two tests
+MOVE_SQUARE_BONUS = (_move_square_bonuses(7), _move_square_bonuses(0))
+
+
+def extract_bitboards(board):
+    """
+    Return the 12 piece bitboards of a board as a tuple:
+    White P, N, B, R, Q, K followed by Black P, N, B, R, Q, K.
+    """
+    return tuple(
+        board.pieces_mask(piece_type, color)
+        for color in (chess.WHITE, chess.BLACK)
+        for piece_type in chess.PIECE_TYPES
+    )
+
+
+def evaluate(bitboards, white_to_move):
+    """
+    Score 12 piece bitboards (see extract_bitboards) in centipawns
+    from the side to move's point of view.
+    """
+    score = 0
+    for index, mask in enumerate(bitboards):
+        if not mask:
+            continue
+        piece_type = index % 6 + 1
+        table = PIECE_SQUARE_TABLES[piece_type]
+        if index < 6:
+            score += PIECE_VALUES[piece_type] * mask.bit_count()
+            for square in chess.scan_forward(mask):
+                score += table[square ^ 56]
+        else:
+            score -= PIECE_VALUES[piece_type] * mask.bit_count()
+            for square in chess.scan_forward(mask):
+                score -= table[square]
+    return score if white_to_move else -score
+
+
+def evaluate_board(board):
+    """Evaluate a python-chess Board for the side to move"""
+    return evaluate(extract_bitboards(board), board.turn == chess.WHITE)
+
+def score_move(victim_value, gives_check, is_mate, attacker_count, own_value,
+               square_bonus, hang_factor, noise):
+    """
+    Heuristic score of a single move from precomputed features (higher is better).
+    square_bonus comes from MOVE_SQUARE_BONUS. hang_factor scales the penalty for
+    moving onto an attacked square and noise is added as-is; both let weaker
+    skill levels play less precisely.
+    """
+    score = 50 + victim_value * 10
+    if gives_check:
+        score += 15  # Checks are tactically valuable
+    if is_mate:
+        score += 1000  # Checkmate is always best
+    if attacker_count:
+        score -= own_value * 5 * hang_factor
+    return score + square_bonus + noise
+
+# Made with Bob
@@ -0,0 +1,14 @@
+from board import ChessBoard
+from player import HumanPlayer, ComputerPlayer
+
+# Default skill level is 5 (intermediate)
+DEFAULT_SKILL_LEVEL = 5
+
+class GameState:
+    """Everything that belongs to a single game: the board and both players"""
+    def __init__(self, skill_level=DEFAULT_SKILL_LEVEL):
+        self.board = ChessBoard()
+        self.human = HumanPlayer('white')
+        self.computer = ComputerPlayer('black', skill_level=skill_level)
+
+# Made with Bob
@@ -12,10 +12,11 @@ ollama serve &
 echo "Waiting for Ollama to start..."
 sleep 5
 
-# Pull the llama2 model if it doesn't exist
-if ! ollama list | grep -q "llama2"; then
-    echo "Pulling llama2 model..."
-    ollama pull llama2
+# Pull the chess model (LLM_MODEL, default llama2) if it doesn't exist
+LLM_MODEL="${LLM_MODEL:-llama2}"
+if ! ollama list | grep -q "$LLM_MODEL"; then
+    echo "Pulling $LLM_MODEL model..."
+    ollama pull "$LLM_MODEL"
 fi
 
 # Keep the container running
@@ -1,8 +1,118 @@
+import asyncio
+import heapq
 import requests
-import json
+import logging
 import random
 import os
+import re
+import threading
+import weakref
 import chess
+import orjson
+import evaluator
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from operator import itemgetter
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds for Ollama requests, so a hung server can't stall a worker
+OLLAMA_TIMEOUT = (3, float(os.environ.get('OLLAMA_TIMEOUT', 30)))
+
+# Number of requests the Ollama server handles at once (its OLLAMA_NUM_PARALLEL setting);
+# used to size the connection pool so batched calls each get a kept-alive connection
+OLLAMA_NUM_PARALLEL = int(os.environ.get('OLLAMA_NUM_PARALLEL', 4))
+
+# Shared HTTP session so connections to Ollama are kept alive and reused across moves
+_SESSION = requests.Session()
+_SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=OLLAMA_NUM_PARALLEL))
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=OLLAMA_NUM_PARALLEL))
+_SESSION.headers.update({'Content-Type': 'application/json', 'Accept': 'application/json'})
+
+# Transposition table bound flags: the stored value is exact, a lower bound (fail-high)
+# or an upper bound (fail-low) of the position's true score
+TT_EXACT = 0
+TT_LOWER_BOUND = 1
+TT_UPPER_BOUND = 2
+
+# Maximum number of positions kept in a player's transposition table
+TT_MAX_ENTRIES = 1 << 18
+
+TTEntry = namedtuple('TTEntry', ['depth', 'value', 'flag', 'best_move'])
+
+# Token budget for a {"move": "<uci>"} answer from the LLM
+MOVE_NUM_PREDICT = 16
+# Anything shaped like a UCI move (e.g. e2e4, e7e8q) in a free-form LLM reply
+UCI_MOVE_RE = re.compile(r"[a-h][1-8][a-h][1-8][qrbn]?")
+
+# Score noise added per move: +/-20 below skill 5, +/-10 below skill 8
+NOISE_VALUES_WIDE = tuple(range(-20, 21))
+NOISE_VALUES_NARROW = tuple(range(-10, 11))
+
+# UCI strings repeat heavily across positions (e2e4, g1f3, ...), so parse each one once
+_move_from_uci = lru_cache(maxsize=8192)(chess.Move.from_uci)
+
+# Most moves offered to the LLM in one prompt
+MAX_PROMPT_MOVES = 12
+# Context window sent with every Ollama request. Ollama reloads the model whenever num_ctx
+# changes, so move and hint-explanation requests must agree; 1024 fits the longer
+# explanation prompts and replies while keeping the KV cache well below the model default
+OLLAMA_NUM_CTX = 1024
+
+# LLM persona for each skill level, indexed by skill level (index 0 unused)
+SKILL_INSTRUCTIONS = (
+    None,
+    "You are a complete beginner learning chess. Make simple, straightforward moves without much planning. You sometimes miss obvious threats.",
+    "You are a novice player. Focus on basic piece development and control of the center. You understand basic principles but make frequent mistakes.",
+    "You are learning chess strategy. Consider piece safety and basic tactics, but occasionally overlook threats or miss simple combinations.",
+    "You are an improving player. Think one or two moves ahead and try to develop your pieces harmoniously. You occasionally miss tactical opportunities.",
+    "You are an intermediate player. Consider basic tactics, piece activity, and pawn structure. Look for simple combinations and tactical threats.",
+    "You are a club-level player. Look for tactical opportunities like forks, pins, and skewers. Consider both tactics and positional factors.",
+    "You are a strong club player. Evaluate multiple candidate moves carefully. Consider tactical combinations and strategic plans.",
+    "You are an advanced player. Analyze tactical and positional factors deeply. Consider piece coordination, king safety, and long-term plans.",
+    "You are an expert player. Conduct deep analysis with strategic planning. Evaluate multiple lines and consider complex positional factors.",
+    "You are a chess master. Find the objectively best move by analyzing all tactical and strategic elements with precision.",
+)
+
+# Move prompt, kept terse and unindented: every prompt token costs prefill time.
+# {persona} is a skill instruction plus newline, or empty when the Ollama context already has it
+MOVE_PROMPT_TEMPLATE = (
+    "{persona}"
+    "FEN: {fen}\n"
+    "You play: {color}\n"
+    "Legal moves (UCI): {moves}\n"
+    'Reply with only JSON: {{"move": "<uci>"}}'
+)
+
+# Chance of swapping the chosen move for a random one, indexed by skill level
+MISTAKE_CHANCE = (0.0, 0.50, 0.50, 0.35, 0.35, 0.20, 0.20, 0.10, 0.10, 0.05, 0.0)
+# Share of the ranked moves the LLM gets to see, indexed by skill level
+KEEP_PERCENTAGE = (1.0, 0.4, 0.4, 0.4, 0.65, 0.65, 0.65, 0.8, 1.0, 1.0, 1.0)
+
+# Moves the LLM picked before, keyed by (FEN without move counters, skill level, model)
+LLM_MOVE_CACHE_SIZE = 4096
+_llm_move_cache = OrderedDict()
+_llm_move_cache_lock = threading.Lock()
+
+def _cached_llm_move(key):
+    """Return the LLM's earlier move for a cache key, or None"""
+    with _llm_move_cache_lock:
+        move = _llm_move_cache.get(key)
+        if move is not None:
+            _llm_move_cache.move_to_end(key)
+        return move
+
+def _cache_llm_move(key, move):
+    """Remember the LLM's move for a cache key, evicting the oldest entry when full"""
+    with _llm_move_cache_lock:
+        _llm_move_cache[key] = move
+        _llm_move_cache.move_to_end(key)
+        if len(_llm_move_cache) > LLM_MOVE_CACHE_SIZE:
+            _llm_move_cache.popitem(last=False)
+
+# Search scores are in centipawns from the side to move's point of view
+MATE_SCORE = 100000
 
 class Player:
     def __init__(self, color):
@@ -19,86 +129,166 @@ class ComputerPlayer(Player):
         # Get Ollama host from environment variable or use default
         ollama_host = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
         self.llm_url = llm_url or f"{ollama_host}/api/generate"
-        self.model = "llama2"  # Default model for Ollama
+        # Ollama model tag. The library's default "llama2" tag is already 4-bit quantized;
+        # point LLM_MODEL at another tag (e.g. a q8_0 build) to trade speed for strength
+        self.model = os.environ.get('LLM_MODEL', 'llama2')
+        # HTTP session for Ollama. Players are recreated whenever the skill level
+        # changes, so they share the module-level session to keep its connections warm
+        self._session = _SESSION
+        # Random source for move-scoring noise
+        self._rng = random.Random()
+        # Ollama's encoded context from the previous move request, per ChessBoard (game).
+        # Passing it back lets the server reuse the KV cache for the shared prefix (the
+        # skill persona). One player can serve several games at once (the hint player,
+        # make_move_batch), so contexts are keyed by board and guarded by a lock
+        self._ollama_contexts = weakref.WeakKeyDictionary()
+        self._context_lock = threading.Lock()
         # Skill level: 1-10 (1=beginner, 5=intermediate, 10=master)
         self.skill_level = max(1, min(10, skill_level))  # Clamp between 1-10
+        # Transposition table for search, kept across turns: position key -> TTEntry
+        self.tt = {}
     
     def make_move(self, board):
         """Generate a move using the LLM"""
+        # Beginner levels play randomly: sample straight from the move generator
+        # and skip the prompt, the LLM round-trip and UCI conversion of every move
+        if self.skill_level <= 2:
+            moves = list(board.board.generate_legal_moves())
+            if not moves:
+                return False, {"error": "No legal moves available"}
+            return board.make_move(random.choice(moves).uci())
+
         # Get the current board state
         board_state = board.get_board_state()
         legal_moves = board_state['legal_moves']
         
         if not legal_moves:
             return False, {"error": "No legal moves available"}
+
+        if len(legal_moves) == 1:
+            # Forced move: nothing to filter, prompt or score
+            return board.make_move(legal_moves[0])
         
         # If there are legal moves, use LLM to choose the best one
-        best_move = self._get_llm_move(board, legal_moves)
+        best_move = self._get_llm_move(board, board_state)
         
         # Make the move on the board
         return board.make_move(best_move)
     
-    def _get_llm_move(self, board, legal_moves):
-        """Use a free LLM to determine the best move with skill-based selection"""
-        try:
-            # Filter moves based on skill level (Phase 3)
-            filtered_moves = self._filter_moves_by_skill(board, legal_moves)
+    async def make_move_batch(self, boards):
+        """
+        Make a move on each of several independent boards (e.g. self-play or
+        tournament games) concurrently. Returns one (success, state) per board.
 
-            # Prepare the prompt for the LLM
-            prompt = self._create_chess_prompt(board, filtered_moves)
+        The LLM calls overlap, so wall time approaches a single round-trip as
+        long as the Ollama server runs them in parallel: raise its
+        OLLAMA_NUM_PARALLEL (and OLLAMA_MAX_LOADED_MODELS if several models are
+        in use) to match the batch size.
+        """
+        return await asyncio.gather(*(asyncio.to_thread(self.make_move, board) for board in boards))
 
-            # Call the LLM API (Ollama)
-            response = self._call_ollama_api(prompt)
+    async def _get_llm_moves_batch(self, prompts):
+        """
+        Send several move prompts to Ollama concurrently and return the raw responses.
+        The prompts aren't tied to a board, so no Ollama context is sent or kept.
+        """
+        return await asyncio.gather(
+            *(asyncio.to_thread(self._call_ollama_api, prompt, True) for prompt in prompts)
+        )
 
-            # Parse the response to get the move
-            move = self._parse_llm_response(response, filtered_moves)
+    def reset_context(self):
+        """Forget the Ollama contexts, e.g. when a new game starts"""
+        with self._context_lock:
+            self._ollama_contexts.clear()
+
+    def _context_for(self, board):
+        """Ollama context from the last move request on this board, or None"""
+        with self._context_lock:
+            return self._ollama_contexts.get(board)
+
+    def _get_llm_move(self, board, board_state):
+        """Use a free LLM to determine the best move with skill-based selection"""
+        return self._choose_llm_move(board, board_state)[0]
+
+    def _choose_llm_move(self, board, board_state):
+        """
+        Pick a move as _get_llm_move does. Returns (move, from_llm), where
+        from_llm is False when the LLM gave no usable answer and the move
+        is a random fallback.
+        """
+        legal_moves = board_state['legal_moves']
+        if len(legal_moves) == 1:
+            return legal_moves[0], True
+        try:
+            # Parse every move once; ranking works on (uci, Move) pairs from here on
+            parsed_moves = [(move_uci, _move_from_uci(move_uci)) for move_uci in legal_moves]
+
+            # Filter moves based on skill level (Phase 3)
+            filtered_moves = self._filter_moves_by_skill(board, parsed_moves)
+
+            # Positions repeat across games: reuse the LLM's earlier pick for this
+            # position when the skill filter still offers it
+            fen = board_state['fen']
+            cache_key = (" ".join(fen.split()[:4]), self.skill_level, self.model)
+            move = _cached_llm_move(cache_key)
+            from_llm = True
+
+            if move is None or move not in filtered_moves:
+                # Long move lists dominate the prompt, so only offer the best few.
+                # A skill-filtered list is already ranked best-first; an unfiltered one isn't
+                prompt_moves = filtered_moves
+                if len(prompt_moves) > MAX_PROMPT_MOVES:
+                    if len(filtered_moves) == len(legal_moves):
+                        prompt_moves = self._rank_moves(board, parsed_moves, MAX_PROMPT_MOVES)
+                    else:
+                        prompt_moves = filtered_moves[:MAX_PROMPT_MOVES]
+
+                # Prepare the prompt for the LLM, continuing this game's Ollama context if any
+                context = self._context_for(board)
+                prompt = self._create_chess_prompt(board_state, prompt_moves, context)
+
+                # Call the LLM API (Ollama)
+                response = self._call_ollama_api(
+                    prompt, json_mode=True, board=board, context=context
+                )
+
+                # Parse the response to get the move
+                move = self._parse_llm_response(response, filtered_moves)
+                if move is None:
+                    # Fallback to a random move, which is not worth caching
+                    logger.debug("Using random move as fallback")
+                    move = random.choice(filtered_moves)
+                    from_llm = False
+                else:
+                    _cache_llm_move(cache_key, move)
 
             # Apply skill-based probabilistic selection
             final_move = self._select_move_by_skill(move, legal_moves)
 
-            return final_move
+            return final_move, from_llm
         except Exception as e:
-            print(f"Error using LLM: {str(e)}")
+            logger.warning("Error using LLM: %s", e)
             # Fallback to random move if LLM fails
-            return random.choice(legal_moves)
+            return random.choice(legal_moves), False
     
-    def _create_chess_prompt(self, board, legal_moves):
+    def _create_chess_prompt(self, board_state, legal_moves, context=None):
         """Create a prompt for the LLM to analyze the chess position with skill level tuning"""
-        board_state = board.get_board_state()
-        fen = board_state['fen']
-
-        # Skill-based instruction mapping
-        skill_instructions = {
-            1: "You are a complete beginner learning chess. Make simple, straightforward moves without much planning. You sometimes miss obvious threats.",
-            2: "You are a novice player. Focus on basic piece development and control of the center. You understand basic principles but make frequent mistakes.",
-            3: "You are learning chess strategy. Consider piece safety and basic tactics, but occasionally overlook threats or miss simple combinations.",
-            4: "You are an improving player. Think one or two moves ahead and try to develop your pieces harmoniously. You occasionally miss tactical opportunities.",
-            5: "You are an intermediate player. Consider basic tactics, piece activity, and pawn structure. Look for simple combinations and tactical threats.",
-            6: "You are a club-level player. Look for tactical opportunities like forks, pins, and skewers. Consider both tactics and positional factors.",
-            7: "You are a strong club player. Evaluate multiple candidate moves carefully. Consider tactical combinations and strategic plans.",
-            8: "You are an advanced player. Analyze tactical and positional factors deeply. Consider piece coordination, king safety, and long-term plans.",
-            9: "You are an expert player. Conduct deep analysis with strategic planning. Evaluate multiple lines and consider complex positional factors.",
-            10: "You are a chess master. Find the objectively best move by analyzing all tactical and strategic elements with precision."
-        }
-
-        skill_instruction = skill_instructions.get(self.skill_level, skill_instructions[5])
-
-        prompt = f"""
-        {skill_instruction}
-
-        Analyze this chess position in FEN notation:
-        {fen}
-
-        You are playing as {self.color}. The legal moves in UCI notation are:
-        {', '.join(legal_moves)}
-
-        Choose a move that matches your skill level from the legal moves list.
-        Respond with ONLY the UCI notation of your chosen move (e.g., 'e2e4'). Do not include any explanation.
-        """
-        return prompt
+        # The persona is already in the Ollama context when one is being reused
+        persona = "" if context else SKILL_INSTRUCTIONS[self.skill_level] + "\n"
+        return MOVE_PROMPT_TEMPLATE.format(
+            persona=persona, fen=board_state['fen'], color=self.color, moves=" ".join(legal_moves)
+        )
     
-    def _call_ollama_api(self, prompt):
-        """Call the Ollama API to get a response with skill-based temperature control"""
+    def _call_ollama_api(self, prompt, json_mode=False, board=None, context=None):
+        """
+        Call the Ollama API to get a response with skill-based temperature control.
+        With json_mode the model is constrained to emit a short JSON object,
+        which is how moves are requested; free-text prompts (hint explanations)
+        leave it off. Replies aren't streamed: a move answer is capped by
+        num_predict, and Ollama only sends the context with the complete reply.
+        A json_mode request sends `context` and stores the returned one for
+        `board`; without a board no context is kept.
+        """
         # Map skill level (1-10) to temperature (0.9-0.1)
         # Lower skill = higher temperature (more randomness/mistakes)
         # Higher skill = lower temperature (more deterministic/accurate)
@@ -112,41 +302,77 @@ class ComputerPlayer(Player):
             "model": self.model,
             "prompt": prompt,
             "stream": False,
-            "temperature": temperature,
-            "top_p": top_p
+            "options": {
+                "temperature": temperature,
+                "top_p": top_p,
+                "num_ctx": OLLAMA_NUM_CTX
+            }
         }
+        if json_mode:
+            # A {"move": "<uci>"} answer is only a handful of tokens; capping generation
+            # stops chatty models from spending seconds on explanations we throw away
+            payload["format"] = "json"
+            payload["options"]["num_predict"] = MOVE_NUM_PREDICT
+            if context:
+                payload["context"] = context
 
         try:
-            response = requests.post(self.llm_url, json=payload)
+            # orjson encodes/decodes far faster than the stdlib json used by json= / .json()
+            response = self._session.post(self.llm_url, data=orjson.dumps(payload), timeout=OLLAMA_TIMEOUT)
             response.raise_for_status()
-            return response.json()['response'].strip()
-        except requests.exceptions.RequestException as e:
-            print(f"Error calling Ollama API: {str(e)}")
-            print("Using fallback random move strategy")
+            data = orjson.loads(response.content)
+            if json_mode:
+                self._store_context(board, data.get('context'))
+            return data['response'].strip()
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            logger.warning("Error calling Ollama API: %s", e)
+            logger.info("Using fallback random move strategy")
             # Return a placeholder response that will trigger the fallback
             return "FALLBACK_RANDOM_MOVE"
     
+    def _store_context(self, board, context):
+        """Keep Ollama's returned context for the next move request on this board"""
+        if board is None:
+            return
+        with self._context_lock:
+            # The context grows with every turn; once it would crowd the window,
+            # drop it so the next prompt starts fresh with the persona
+            if context and len(context) <= OLLAMA_NUM_CTX // 2:
+                self._ollama_contexts[board] = context
+            else:
+                self._ollama_contexts.pop(board, None)
+
     def _parse_llm_response(self, response, legal_moves):
-        """Parse the LLM response to extract a valid chess move"""
+        """
+        Parse the LLM response to extract a valid chess move.
+        Returns None if the response doesn't name one of the legal moves.
+        """
         # Check for fallback indicator
         if response == "FALLBACK_RANDOM_MOVE":
-            print("Using random move as fallback")
-            return random.choice(legal_moves)
+            return None
 
         # Clean up the response
         response = response.strip()
+        legal_set = set(legal_moves)
+
+        # Moves are requested as {"move": "<uci>"}
+        try:
+            move = orjson.loads(response).get('move')
+        except (ValueError, AttributeError):
+            move = None
+        if isinstance(move, str) and move.strip() in legal_set:
+            return move.strip()
 
         # Check if the response is directly a move in the legal moves list
-        if response in legal_moves:
+        if response in legal_set:
             return response
 
-        # Try to find any legal move in the response
-        for move in legal_moves:
-            if move in response:
-                return move
+        # Free-form answer: take the first UCI-shaped token that is a legal move
+        for match in UCI_MOVE_RE.finditer(response):
+            if match.group() in legal_set:
+                return match.group()
 
-        # If no valid move found, return a random legal move
-        return random.choice(legal_moves)
+        return None
 
     def _select_move_by_skill(self, best_move, legal_moves):
         """
@@ -161,158 +387,217 @@ class ComputerPlayer(Player):
         - Level 9: 5% chance of random move
         - Level 10: 0% chance (always best move)
         """
-        if self.skill_level >= 10:
-            return best_move
-
-        # Calculate mistake probability based on skill level
         # Higher skill = lower mistake chance
-        if self.skill_level <= 2:
-            mistake_chance = 0.50
-        elif self.skill_level <= 4:
-            mistake_chance = 0.35
-        elif self.skill_level <= 6:
-            mistake_chance = 0.20
-        elif self.skill_level <= 8:
-            mistake_chance = 0.10
-        else:  # skill_level == 9
-            mistake_chance = 0.05
+        mistake_chance = MISTAKE_CHANCE[self.skill_level]
+        if not mistake_chance:
+            return best_move
 
         # Roll the dice - should we make a mistake?
         if random.random() < mistake_chance:
-            print(f"Skill level {self.skill_level}: Making a suboptimal move (mistake chance: {mistake_chance*100}%)")
+            logger.debug("Skill level %s: Making a suboptimal move (mistake chance: %s%%)", self.skill_level, mistake_chance * 100)
             return random.choice(legal_moves)
 
         return best_move
 
-    def _filter_moves_by_skill(self, board, legal_moves):
+    def _filter_moves_by_skill(self, board, parsed_moves):
         """
         Filter legal moves based on skill level before asking LLM.
         Lower skills won't see advanced moves or tactical opportunities.
+        Takes (uci, Move) pairs and returns the UCIs that are kept.
 
         Skill level 1-3: Only basic moves (development, captures)
         Skill level 4-6: Add some tactical awareness
         Skill level 7-9: Most moves available, filter obvious blunders
         Skill level 10: All moves available
         """
-        if self.skill_level >= 8:
-            # Advanced players see all moves
-            return legal_moves
+        keep_percentage = KEEP_PERCENTAGE[self.skill_level]
+        if keep_percentage >= 1.0 or len(parsed_moves) <= 3:
+            # Advanced players see all moves, and very few moves aren't worth filtering
+            return [move_uci for move_uci, move in parsed_moves]
+
+        num_moves_to_keep = max(3, int(len(parsed_moves) * keep_percentage))
 
-        if len(legal_moves) <= 3:
-            # If there are very few moves, don't filter
-            return legal_moves
+        filtered = self._rank_moves(board, parsed_moves, num_moves_to_keep)
 
-        # Score all legal moves
+        logger.debug("Skill level %s: Filtered from %s to %s moves", self.skill_level, len(parsed_moves), len(filtered))
+        return filtered
+
+    def _rank_moves(self, board, parsed_moves, count):
+        """Return the UCIs of the `count` best (uci, Move) pairs by heuristic score, best first"""
+        noise, hang_factors = self._draw_move_noise(len(parsed_moves))
+        # Scored serially: python-chess is pure Python and holds the GIL, so worker
+        # threads would only add hand-off overhead
+        scored_moves = self._score_moves(board.board, parsed_moves, noise, hang_factors)
+
+        # Keep the highest-scoring moves; no need to sort the whole list
+        top_moves = heapq.nlargest(count, scored_moves, key=itemgetter(1))
+        return [move for move, score in top_moves]
+
+    def _score_moves(self, board, parsed_moves, noise, hang_factors):
+        """Score each (uci, Move) pair on `board`, returning (uci, score) pairs in order"""
         scored_moves = []
-        for move_uci in legal_moves:
+        for i, (move_uci, move) in enumerate(parsed_moves):
             try:
-                move = chess.Move.from_uci(move_uci)
-                score = self._evaluate_move(board.board, move, self.skill_level)
+                score = self._evaluate_move(board, move, self.skill_level, noise[i], hang_factors[i])
                 scored_moves.append((move_uci, score))
             except Exception as e:
                 # If we can't evaluate, give it a neutral score
                 scored_moves.append((move_uci, 50))
+        return scored_moves
 
-        # Sort moves by score (descending)
-        scored_moves.sort(key=lambda x: x[1], reverse=True)
-
-        # Determine how many moves to keep based on skill level
-        if self.skill_level <= 3:
-            # Beginners: keep top 30-50% of moves
-            keep_percentage = 0.4
-        elif self.skill_level <= 6:
-            # Intermediate: keep top 60-70% of moves
-            keep_percentage = 0.65
+    def _draw_move_noise(self, count):
+        """
+        Draw the random parts of scoring `count` moves in one go: a score noise term
+        and a hanging-piece awareness factor per move. Lower skill levels play
+        noisier and may not notice hanging pieces.
+        """
+        if self.skill_level < 5:
+            noise = self._rng.choices(NOISE_VALUES_WIDE, k=count)
+            hang_factors = [self._rng.random() for _ in range(count)]
+        elif self.skill_level < 8:
+            noise = self._rng.choices(NOISE_VALUES_NARROW, k=count)
+            hang_factors = [1.0] * count
         else:
-            # Advanced: keep top 80% of moves
-            keep_percentage = 0.8
-
-        num_moves_to_keep = max(3, int(len(scored_moves) * keep_percentage))
-        filtered = [move for move, score in scored_moves[:num_moves_to_keep]]
+            noise = [0] * count
+            hang_factors = [1.0] * count
+        return noise, hang_factors
 
-        print(f"Skill level {self.skill_level}: Filtered from {len(legal_moves)} to {len(filtered)} moves")
-        return filtered
-
-    def _evaluate_move(self, board, move, skill_level):
+    def _evaluate_move(self, board, move, skill_level, noise=0, hang_factor=1.0):
         """
         Simple heuristic evaluation of a chess move.
         Returns a score (higher is better).
+
+        The position features are read off python-chess bitboards here;
+        the scoring arithmetic lives in evaluator.score_move. noise and
+        hang_factor come from _draw_move_noise.
         """
-        score = 50  # Base score
+        # Value of the captured piece, if any
+        victim_value = 0
+        if board.is_capture(move):
+            victim_type = board.piece_type_at(move.to_square)
+            if victim_type:
+                victim_value = evaluator.MOVE_PIECE_VALUES[victim_type]
+
+        # Only checking moves need the resulting position, to test for mate
+        gives_check = board.gives_check(move)
+        is_mate = False
+        if gives_check:
+            board.push(move)
+            is_mate = board.is_checkmate()
+            board.pop()
 
-        # Piece value mapping
-        piece_values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
-            chess.KING: 0
-        }
+        # Simple hanging piece detection: count the opponent's attackers of the
+        # destination square on the current board, like a static exchange check
+        own_value = evaluator.MOVE_PIECE_VALUES[move.promotion or board.piece_type_at(move.from_square)]
+        attacker_count = board.attackers_mask(not board.turn, move.to_square).bit_count()
 
-        # Check if this is a capture
-        if board.is_capture(move):
-            captured_piece = board.piece_at(move.to_square)
-            if captured_piece:
-                # Reward captures based on piece value
-                score += piece_values.get(captured_piece.piece_type, 0) * 10
-
-        # Make the move temporarily to evaluate position
-        board.push(move)
-
-        # Check if this move gives check
-        if board.is_check():
-            score += 15  # Checks are tactically valuable
-
-        # Check if this move leads to checkmate
-        if board.is_checkmate():
-            score += 1000  # Checkmate is always best
-
-        # Check if we're putting our own pieces in danger (simple hanging piece detection)
-        # This is a simplified approach - a real engine would do much more
-        attacking_squares = board.attacks(move.to_square)
-        piece_at_dest = board.piece_at(move.to_square)
-        if piece_at_dest:
-            piece_value = piece_values.get(piece_at_dest.piece_type, 0)
-            # Count attackers and defenders
-            attackers = len(list(board.attackers(not board.turn, move.to_square)))
-            if attackers > 0:
-                # Piece might be hanging - penalize based on skill
-                if skill_level < 5:
-                    # Lower skill might not notice hanging pieces
-                    score -= piece_value * 5 * random.uniform(0, 1)
-                else:
-                    score -= piece_value * 5
+        return evaluator.score_move(
+            victim_value, gives_check, is_mate, attacker_count, own_value,
+            evaluator.MOVE_SQUARE_BONUS[self.color == 'white'][move.from_square * 64 + move.to_square],
+            hang_factor, noise
+        )
 
-        # Center control bonus (e4, e5, d4, d5)
-        center_squares = [chess.E4, chess.E5, chess.D4, chess.D5]
-        if move.to_square in center_squares:
-            score += 8
+    def _tt_probe(self, key, depth, alpha, beta):
+        """
+        Look up a searched position in the transposition table.
+        Returns the stored value if it is deep enough and usable within
+        the (alpha, beta) window, otherwise None.
+        """
+        entry = self.tt.get(key)
+        if entry is None or entry.depth < depth:
+            return None
+        if entry.flag == TT_EXACT:
+            return entry.value
+        if entry.flag == TT_LOWER_BOUND and entry.value >= beta:
+            return entry.value
+        if entry.flag == TT_UPPER_BOUND and entry.value <= alpha:
+            return entry.value
+        return None
+
+    def _tt_store(self, key, depth, value, flag, best_move=None):
+        """
+        Store a search result in the transposition table.
+        Deeper results for a known position are preferred; when the table is
+        full the oldest position is evicted.
+        """
+        entry = self.tt.get(key)
+        if entry is not None:
+            if entry.depth > depth:
+                return
+        elif len(self.tt) >= TT_MAX_ENTRIES:
+            del self.tt[next(iter(self.tt))]
+        self.tt[key] = TTEntry(depth, value, flag, best_move)
+
+    def _search(self, board, depth, alpha, beta):
+        """
+        Negamax alpha-beta search on a python-chess Board.
+        Returns the score of the position for the side to move.
 
-        # Development bonus (moving pieces from back rank)
-        from_rank = chess.square_rank(move.from_square)
-        if self.color == 'black' and from_rank == 7:
-            score += 5  # Developing from back rank
-        elif self.color == 'white' and from_rank == 0:
-            score += 5
+        Child positions are explored in place with push()/pop(), which keeps
+        python-chess's incremental state and avoids allocating boards. If a
+        copy is ever unavoidable (e.g. handing a position to another thread),
+        use board.copy(stack=False); never copy.deepcopy a Board.
+        """
+        key = board._transposition_key()
+        cached = self._tt_probe(key, depth, alpha, beta)
+        if cached is not None:
+            return cached
+
+        if depth == 0:
+            return self._evaluate_position(board)
+
+        entry = self.tt.get(key)
+        moves = self._order_moves(board, entry.best_move if entry else None)
+        if not moves:
+            # No legal moves: checkmate or stalemate
+            return -MATE_SCORE if board.is_check() else 0
+
+        best_move = None
+        for move in moves:
+            board.push(move)
+            score = -self._search(board, depth - 1, -beta, -alpha)
+            board.pop()
 
-        # Undo the move
-        board.pop()
+            # Cut off on equality too: a move that only matches beta can't improve the result
+            if score >= beta:
+                self._tt_store(key, depth, beta, TT_LOWER_BOUND, move)
+                return beta
+            if score > alpha:
+                alpha = score
+                best_move = move
 
-        # Add some randomness for lower skill levels
-        if skill_level < 5:
-            randomness = random.randint(-20, 20)
-            score += randomness
-        elif skill_level < 8:
-            randomness = random.randint(-10, 10)
-            score += randomness
+        if best_move is None:
+            self._tt_store(key, depth, alpha, TT_UPPER_BOUND)
+        else:
+            self._tt_store(key, depth, alpha, TT_EXACT, best_move)
+        return alpha
 
-        return score
+    def _order_moves(self, board, tt_move=None):
+        """
+        Order legal moves for search: the transposition table's best move first,
+        then captures by MVV-LVA (most valuable victim, least valuable attacker),
+        then quiet moves.
+        """
+        def mvv_lva(move):
+            if not board.is_capture(move):
+                return 0
+            # En passant captures land on an empty square but always take a pawn
+            victim = board.piece_type_at(move.to_square) or chess.PAWN
+            return 10 * victim - board.piece_type_at(move.from_square)
+
+        return sorted(board.legal_moves, key=lambda move: (move != tt_move, -mvv_lva(move)))
+
+    def _evaluate_position(self, board):
+        """Static evaluation in centipawns for the side to move"""
+        return evaluator.evaluate_board(board)
 
     def get_hint(self, board, hint_level='basic'):
         """
         Generate a hint for the current position with explanation.
         hint_level: 'basic', 'intermediate', 'advanced'
+
+        The hint's 'fallback' entry is True when the LLM couldn't be used for
+        the move or the explanation, so callers know not to reuse it.
         """
         try:
             board_state = board.get_board_state()
@@ -322,14 +607,15 @@ class ComputerPlayer(Player):
                 return {
                     'move': None,
                     'explanation': 'No legal moves available in this position.',
-                    'category': 'game_over'
+                    'category': 'game_over',
+                    'fallback': False
                 }
             
             # Get the best move with full analysis
-            best_move = self._get_best_move_for_hint(board, legal_moves)
+            best_move, move_from_llm = self._get_best_move_for_hint(board, board_state)
             
             # Generate explanation based on hint level
-            explanation = self._generate_hint_explanation(board, best_move, legal_moves, hint_level)
+            explanation, explanation_from_llm = self._generate_hint_explanation(board, board_state, best_move, hint_level)
             
             # Categorize the move type
             category = self._categorize_move(board.board, best_move)
@@ -339,11 +625,12 @@ class ComputerPlayer(Player):
                 'explanation': explanation,
                 'category': category,
                 'from_square': best_move[:2] if len(best_move) >= 4 else None,
-                'to_square': best_move[2:4] if len(best_move) >= 4 else None
+                'to_square': best_move[2:4] if len(best_move) >= 4 else None,
+                'fallback': not (move_from_llm and explanation_from_llm)
             }
             
         except Exception as e:
-            print(f"Error generating hint: {str(e)}")
+            logger.warning("Error generating hint: %s", e)
             # Fallback to a random move with basic explanation
             legal_moves = board.get_board_state()['legal_moves']
             if legal_moves:
@@ -353,28 +640,34 @@ class ComputerPlayer(Player):
                     'explanation': 'Consider this move. Look for tactical opportunities and develop your pieces.',
                     'category': 'development',
                     'from_square': random_move[:2],
-                    'to_square': random_move[2:4]
+                    'to_square': random_move[2:4],
+                    'fallback': True
                 }
             return None
     
-    def _get_best_move_for_hint(self, board, legal_moves):
-        """Get the best move for hint generation (always use master level analysis)"""
+    def _get_best_move_for_hint(self, board, board_state):
+        """
+        Get the best move for hint generation (always use master level analysis).
+        Returns (move, from_llm) like _choose_llm_move.
+        """
         # Temporarily set skill to master for best analysis
         original_skill = self.skill_level
         self.skill_level = 10
         
         try:
             # Use the existing LLM move generation but with master skill
-            best_move = self._get_llm_move(board, legal_moves)
-            return best_move
+            return self._choose_llm_move(board, board_state)
         finally:
             # Restore original skill level
             self.skill_level = original_skill
     
-    def _generate_hint_explanation(self, board, move, legal_moves, hint_level):
-        """Generate an explanation for the suggested move"""
-        board_state = board.get_board_state()
+    def _generate_hint_explanation(self, board, board_state, move, hint_level):
+        """
+        Generate an explanation for the suggested move.
+        Returns (explanation, from_llm); from_llm is False for the canned fallback.
+        """
         fen = board_state['fen']
+        legal_moves = board_state['legal_moves']
         
         # Adjust explanation complexity based on hint level
         complexity_instructions = {
@@ -405,16 +698,17 @@ class ComputerPlayer(Player):
         
         try:
             response = self._call_ollama_api(prompt)
-            return response.strip()
+            if response != "FALLBACK_RANDOM_MOVE":
+                return response.strip(), True
         except Exception as e:
-            print(f"Error generating explanation: {str(e)}")
-            # Fallback explanation based on move type
-            return self._get_fallback_explanation(board.board, move)
+            logger.warning("Error generating explanation: %s", e)
+        # Fallback explanation based on move type
+        return self._get_fallback_explanation(board.board, move), False
     
     def _get_fallback_explanation(self, board, move):
         """Generate a basic explanation when LLM fails"""
         try:
-            chess_move = chess.Move.from_uci(move)
+            chess_move = _move_from_uci(move)
             
             # Check for basic tactical elements
             if board.is_capture(chess_move):
@@ -441,8 +735,7 @@ class ComputerPlayer(Player):
             board.pop()
             
             # Check for center control
-            center_squares = [chess.E4, chess.E5, chess.D4, chess.D5]
-            if chess_move.to_square in center_squares:
+            if chess.BB_SQUARES[chess_move.to_square] & evaluator.CENTER_MASK:
                 return "Control the center - this is a key strategic principle in chess."
             
             # Check for development
@@ -460,7 +753,7 @@ class ComputerPlayer(Player):
     def _categorize_move(self, board, move):
         """Categorize the type of move for UI styling and filtering"""
         try:
-            chess_move = chess.Move.from_uci(move)
+            chess_move = _move_from_uci(move)
             
             # Check for checkmate
             board.push(chess_move)
@@ -488,8 +781,7 @@ class ComputerPlayer(Player):
                 return 'promotion'
             
             # Check for center moves
-            center_squares = [chess.E4, chess.E5, chess.D4, chess.D5]
-            if chess_move.to_square in center_squares:
+            if chess.BB_SQUARES[chess_move.to_square] & evaluator.CENTER_MASK:
                 return 'center'
             
             # Check for development
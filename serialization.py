@@ -0,0 +1,41 @@
+"""
+Helpers for turning board positions into the JSON shapes the frontend expects.
+"""
+
+import chess
+from functools import lru_cache
+
+# Square index -> name as labelled by the frontend, which flips the ranks (a1 -> 'a8')
+UI_SQUARE_NAMES = tuple(chess.square_name(chess.square_mirror(square)) for square in chess.SQUARES)
+# In python-chess, piece.color is True for white, False for black
+COLOR_NAMES = ('black', 'white')
+
+@lru_cache(maxsize=4096)
+def _pieces_for(placement):
+    """
+    Build the frontend piece arrays for a placement of
+    (pawns, knights, bishops, rooks, queens, kings, white, black) bitboards.
+    Pieces are sent as parallel arrays (square, type, color) rather than a
+    dict of per-square dicts, which is much cheaper to serialize and parse.
+    The result is cached and shared, so callers must not mutate it.
+    """
+    white = placement[6]
+    squares = []
+    types = []
+    colors = []
+    for piece_type, mask in zip(chess.PIECE_TYPES, placement[:6]):
+        symbol = chess.piece_symbol(piece_type)
+        for square in chess.scan_forward(mask):
+            squares.append(UI_SQUARE_NAMES[square])
+            types.append(symbol)
+            # 1 for white, 0 for black
+            colors.append(1 if white & chess.BB_SQUARES[square] else 0)
+    return {'squares': squares, 'types': types, 'colors': colors}
+
+def add_pieces_to_state(state, chess_board):
+    """Add piece positions to the state for the frontend"""
+    # The first eight fields of the transposition key fully describe the piece placement
+    state.update(_pieces_for(chess_board.board._transposition_key()[:8]))
+    return state
+
+# Made with Bob
@@ -0,0 +1,16 @@
+"""
+WSGI entrypoint for running the chess app under a production server.
+
+Example:
+    gunicorn -k gthread -w 1 --threads 8 -b 0.0.0.0:5000 wsgi:app
+
+Game state lives in the Flask process, so scale with threads rather than
+workers; each thread can wait on Ollama without blocking other players.
+"""
+
+from app import app
+
+if __name__ == '__main__':
+    app.run()
+
+# Made with Bob